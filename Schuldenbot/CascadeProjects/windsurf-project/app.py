@@ -1,15 +1,42 @@
-from flask import Flask, render_template, request, jsonify, session
-from datetime import datetime, timedelta
-import json
+from quart import Quart, Response, render_template, request, jsonify
+from quart.json.provider import DefaultJSONProvider
+from redis.asyncio import Redis
+from collections import defaultdict, namedtuple
+from datetime import timedelta
+import asyncio
+import orjson
 import os
+import random
 import re
+import secrets
+import time
 from typing import Dict, List, Optional, Union
 
-app = Flask(__name__)
+class OrjsonProvider(DefaultJSONProvider):
+    """JSON provider backed by orjson for faster request/response (de)serialization."""
 
-# Simple in-memory storage for demo purposes
-# In a production environment, use a proper database
+    def dumps(self, obj, **kwargs) -> str:
+        return orjson.dumps(obj, default=self.default).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+app = Quart(__name__)
+app.json = OrjsonProvider(app)
+
+# Conversations expire after 24 hours of inactivity
+CONVERSATION_TTL = 24 * 60 * 60
+# How often the in-memory store is swept for expired conversations
+CLEANUP_INTERVAL = 5 * 60
+
+# Store conversations in Redis when REDIS_URL is set, so state is shared across
+# workers and expired by Redis itself. Otherwise fall back to a simple in-memory
+# store for local development (single worker only).
+REDIS_URL = os.environ.get('REDIS_URL')
+redis_client = Redis.from_url(REDIS_URL, decode_responses=True) if REDIS_URL else None
 conversations = {}
+cleanup_task = None
+index_html = None
 
 # Emergency resources
 EMERGENCY_RESOURCES = {
@@ -32,9 +59,9 @@ EXPENSE_CATEGORIES = {
 GREETING = "Hallo! Ich bin SchuldenKompass. Erzähl mir: Was beschäftigt dich gerade am meisten, wenn du an deine finanzielle Situation denkst?"
 
 # Define the conversation flow
-CONVERSATION_FLOW = [
+_RAW_FLOW = [
     {
-        'key': 'main_concern',
+        'key': 'income',
         'question': 'Das klingt wirklich belastend. Vielen Dank, dass du das mit mir teilst. Um dir konkret helfen zu können, wäre es gut zu wissen: Wie hoch ist dein aktuelles monatliches Einkommen?',
         'type': 'number',
         'hint': 'Dein Nettoeinkommen in Euro (z.B. 1450)',
@@ -89,10 +116,62 @@ CONVERSATION_FLOW = [
     }
 ]
 
+# A preprocessed conversation step; attribute access avoids repeated dict lookups per request
+Step = namedtuple('Step', 'key question type validation options options_lower hint error')
+
+def _build_step(raw_step: dict) -> Step:
+    """Build a Step, pre-compiling regex validations and lowercasing choice options."""
+    validation = raw_step.get('validation')
+    if validation and validation != 'positive_number':
+        validation = re.compile(validation)
+    options = raw_step.get('options')
+    return Step(
+        key=raw_step['key'],
+        question=raw_step['question'],
+        type=raw_step.get('type', 'text'),
+        validation=validation,
+        options=options,
+        options_lower=tuple(option.lower() for option in options) if options else None,
+        hint=raw_step.get('hint'),
+        error=raw_step.get('error')
+    )
+
+CONVERSATION_FLOW = tuple(_build_step(raw_step) for raw_step in _RAW_FLOW)
+
+_NON_NUMERIC = re.compile(r'[^\d,.]')
+_NUMBER_CHARS = frozenset('0123456789,.')
+
+# Swap English thousands/decimal separators for German ones in a single pass
+_GERMAN_SEPARATORS = str.maketrans(',.', '.,')
+
+# Phrases (lowercase) that indicate a crisis, with the matching response, ordered by severity
+EMERGENCY_PHRASES = {
+    'selbstmord': "Das klingt sehr besorgniserregend. Bitte wende dich sofort an die Telefonseelsorge unter 0800 111 0 111. Du bist nicht allein und es gibt Menschen, die dir helfen können.",
+    'selbstmorden': "Das klingt sehr besorgniserregend. Bitte wende dich sofort an die Telefonseelsorge unter 0800 111 0 111. Du bist nicht allein und es gibt Menschen, die dir helfen können.",
+    'umbringen': "Das klingt sehr beunruhigend. Bitte kontaktiere umgehend eine Vertrauensperson oder die Telefonseelsorge unter 0800 111 0 111.",
+    'sterben': "Es tut mir leid zu hören, dass du solche Gedanken hast. Bitte wende dich an jemanden, der dir helfen kann, zum Beispiel die Telefonseelsorge unter 0800 111 0 111.",
+    'leben beenden': "Das klingt sehr belastend. Bitte wende dich sofort an eine Person deines Vertrauens oder die Telefonseelsorge unter 0800 111 0 111. Du bist nicht allein.",
+    'kann nicht mehr': "Ich höre, wie schwer es dir gerade fällt. Es ist wichtig, dass du dir jetzt Hilfe holst. Möchtest du, dass ich dir dabei helfe, Unterstützung zu finden?",
+    'sinnlos': "Es tut mir leid, dass du dich so fühlst. Manchmal kann es helfen, mit jemandem zu sprechen. Die Telefonseelsorge ist rund um die Uhr erreichbar unter 0800 111 0 111.",
+    'aufgeben': "Ich verstehe, dass du dich überfordert fühlst. Aber es gibt immer einen Ausweg, auch wenn du ihn gerade nicht siehst. Möchtest du, dass wir gemeinsam nach Lösungen suchen?",
+    'keinen ausweg': "Es tut mir leid zu hören, dass du dich so fühlst. Manchmal kann ein Gespräch mit einer neutralen Person helfen. Die Telefonseelsorge ist unter 0800 111 0 111 erreichbar.",
+    'kein sinn mehr': "Ich höre, wie verzweifelt du bist. Bitte glaub mir, dass es Menschen gibt, die dir helfen können. Möchtest du, dass ich dir dabei helfe, Unterstützung zu finden?"
+}
+
+# Single alternation regex so the input is scanned once for all phrases
+EMERGENCY_RE = re.compile('|'.join(re.escape(phrase) for phrase in EMERGENCY_PHRASES))
+EMERGENCY_PRIORITY = {phrase: index for index, phrase in enumerate(EMERGENCY_PHRASES)}
+
 def extract_number(text: str) -> Optional[float]:
     """Extract number from text, handling different decimal separators."""
-    # Remove all non-digit characters except commas and dots
-    clean_text = re.sub(r'[^\d,.]', '', text)
+    text = text.strip()
+    
+    # Fast path for plain whole numbers like "1450"
+    if text.isdecimal():
+        return float(text)
+    
+    # Remove all non-digit characters except commas and dots, skipping the regex if there are none
+    clean_text = text if _NUMBER_CHARS.issuperset(text) else _NON_NUMERIC.sub('', text)
     if not clean_text:
         return None
     
@@ -114,7 +193,7 @@ def extract_number(text: str) -> Optional[float]:
 
 def format_currency(amount: float) -> str:
     """Format number as currency string."""
-    return f"{amount:,.2f} €".replace(',', 'X').replace('.', ',').replace('X', '.')
+    return f"{amount:,.2f} €".translate(_GERMAN_SEPARATORS)
 
 def get_next_question(conversation_state: dict) -> str:
     """Get the next question based on conversation state."""
@@ -127,16 +206,16 @@ def get_next_question(conversation_state: dict) -> str:
     if current_step >= len(CONVERSATION_FLOW):
         return None
     
-    question_data = CONVERSATION_FLOW[current_step]
-    question = question_data['question']
+    step = CONVERSATION_FLOW[current_step]
+    question = step.question
     
     # Add hint if available
-    if 'hint' in question_data:
-        question += f"\n\n({question_data['hint']})"
+    if step.hint:
+        question += f"\n\n({step.hint})"
     
     return question
 
-def validate_input(user_input: str, field_type: str, validation: str = None, options: list = None) -> tuple:
+def validate_input(user_input: str, field_type: str, validation: Union[str, re.Pattern, None] = None, options: list = None, options_lower: tuple = None) -> tuple:
     """Validate user input based on field type and validation rules."""
     user_input = user_input.strip()
     
@@ -148,7 +227,7 @@ def validate_input(user_input: str, field_type: str, validation: str = None, opt
             if number <= 0:
                 return False, "Bitte gib eine positive Zahl ein."
             return True, number
-        elif validation and not re.match(validation, user_input):
+        elif validation and not validation.match(user_input):
             return False, "Ungültiges Format. Bitte versuche es noch einmal."
         return True, number
     
@@ -158,7 +237,9 @@ def validate_input(user_input: str, field_type: str, validation: str = None, opt
             
         # Try to match user input with available options
         user_input_lower = user_input.lower()
-        matched_options = [opt for opt in options if opt.lower().startswith(user_input_lower)]
+        if options_lower is None:
+            options_lower = tuple(opt.lower() for opt in options)
+        matched_options = [opt for opt, opt_lower in zip(options, options_lower) if opt_lower.startswith(user_input_lower)]
         
         if len(matched_options) == 1:
             return True, matched_options[0]
@@ -169,14 +250,57 @@ def validate_input(user_input: str, field_type: str, validation: str = None, opt
     
     return True, user_input
 
+# Plain summary used when the detailed calculation fails
+FALLBACK_SUMMARY = """
+Vielen Dank für deine Angaben. Hier ist eine erste Einschätzung deiner Situation:
+
+• Monatliches Einkommen: {income}
+• Wohnkosten (Miete & NK): {rent}
+• Sonstige Fixkosten: {expenses}
+• Geschätzte Schulden: {total_debt}
+• Anzahl der Gläubiger: {creditors_count}
+
+Basierend auf deinen Angaben empfehle ich dir dringend, eine professionelle Schuldnerberatung aufzusuchen.
+
+Möchtest du, dass ich dir dabei helfe, dich auf das Beratungsgespräch vorzubereiten?
+""".strip()
+
+# Static blocks of the financial summary
+SUMMARY_HEADER = (
+    "🔍 *Deine finanzielle Situation im Überblick:*",
+    ""
+)
+
+SUMMARY_PROFESSIONAL_HELP = (
+    "🚨 **Wichtiger Hinweis:** Da du bereits Mahnungen oder rechtliche Konsequenzen erwähnst, empfehle ich dringend, professionelle Hilfe in Anspruch zu nehmen.",
+    "",
+    f"📞 {EMERGENCY_RESOURCES['debt_advice']}",
+    f"📞 {EMERGENCY_RESOURCES['crisis']}",
+    ""
+)
+
+SUMMARY_NEXT_STEPS = (
+    "📌 **Nächste Schritte:**",
+    "1. Erstelle eine detaillierte Auflistung aller Gläubiger und Forderungen",
+    "2. Erstelle ein Haushaltsbuch, um deine Ausgaben zu tracken",
+    "3. Vereinbare einen Termin bei einer Schuldnerberatung",
+    "",
+    "Womit möchtest du anfangen?"
+)
+
+def get_amount(data: dict, key: str) -> float:
+    """Return a numeric field from the collected data, or 0 if missing or not a number."""
+    value = data.get(key, 0)
+    return float(value) if isinstance(value, (int, float)) else 0
+
 def generate_financial_summary(data: dict) -> str:
     """Generate a summary of the user's financial situation."""
     # Try to convert string numbers to floats for calculations
     try:
-        income = float(data.get('income', 0)) if isinstance(data.get('income'), (int, float)) else 0
-        rent = float(data.get('rent', 0)) if isinstance(data.get('rent'), (int, float)) else 0
-        expenses = float(data.get('expenses', 0)) if isinstance(data.get('expenses'), (int, float)) else 0
-        total_debt = float(data.get('total_debt', 0)) if isinstance(data.get('total_debt'), (int, float)) else 0
+        income = get_amount(data, 'income')
+        rent = get_amount(data, 'rent')
+        expenses = get_amount(data, 'expenses')
+        total_debt = get_amount(data, 'total_debt')
         
         total_expenses = rent + expenses
         monthly_surplus = income - total_expenses
@@ -187,8 +311,7 @@ def generate_financial_summary(data: dict) -> str:
             debt_free_months = int((total_debt / monthly_surplus) + 0.5)  # Round to nearest month
         
         summary = [
-            "🔍 *Deine finanzielle Situation im Überblick:*",
-            "",
+            *SUMMARY_HEADER,
             f"💶 **Monatliches Einkommen:** {format_currency(income) if income > 0 else 'Nicht angegeben'}",
             f"🏠 **Wohnkosten (Miete & NK):** {format_currency(rent) if rent > 0 else 'Nicht angegeben'}",
             f"💳 **Sonstige Fixkosten:** {format_currency(expenses) if expenses > 0 else 'Nicht angegeben'}",
@@ -224,106 +347,83 @@ def generate_financial_summary(data: dict) -> str:
         
         # Add emergency resources if needed
         if data.get('has_warnings') == 'Ja' or data.get('legal_issues') == 'Ja':
-            summary.extend([
-                "🚨 **Wichtiger Hinweis:** Da du bereits Mahnungen oder rechtliche Konsequenzen erwähnst, empfehle ich dringend, professionelle Hilfe in Anspruch zu nehmen.",
-                "",
-                f"📞 {EMERGENCY_RESOURCES['debt_advice']}",
-                f"📞 {EMERGENCY_RESOURCES['crisis']}",
-                ""
-            ])
+            summary.extend(SUMMARY_PROFESSIONAL_HELP)
         
         # Add next steps
-        summary.extend([
-            "📌 **Nächste Schritte:**",
-            "1. Erstelle eine detaillierte Auflistung aller Gläubiger und Forderungen",
-            "2. Erstelle ein Haushaltsbuch, um deine Ausgaben zu tracken",
-            "3. Vereinbare einen Termin bei einer Schuldnerberatung",
-            "",
-            "Womit möchtest du anfangen?"
-        ])
+        summary.extend(SUMMARY_NEXT_STEPS)
         
         return "\n".join(summary)
     
     except (ValueError, TypeError) as e:
         print(f"Error generating summary: {e}")
-        return """
-        Vielen Dank für deine Angaben. Hier ist eine erste Einschätzung deiner Situation:
-        
-        • Monatliches Einkommen: {}
-        • Wohnkosten (Miete & NK): {}
-        • Sonstige Fixkosten: {}
-        • Geschätzte Schulden: {}
-        • Anzahl der Gläubiger: {}
-        
-        Basierend auf deinen Angaben empfehle ich dir dringend, eine professionelle Schuldnerberatung aufzusuchen. 
-        
-        Möchtest du, dass ich dir dabei helfe, dich auf das Beratungsgespräch vorzubereiten?
-        """.format(
-            data.get('income', 'nicht angegeben'),
-            data.get('rent', 'nicht angegeben'),
-            data.get('expenses', 'nicht angegeben'),
-            data.get('total_debt', 'nicht angegeben'),
-            data.get('creditors_count', 'nicht angegeben')
-        )
+        return FALLBACK_SUMMARY.format_map(defaultdict(lambda: 'nicht angegeben', data))
+
+# Phrase pools for varying the bot's replies, picked via a bound method of a
+# module-private Random instance
+_choice = random.Random().choice
+
+ACKNOWLEDGMENTS = (
+    "Verstehe.",
+    "Ich verstehe.",
+    "Danke für diese Information.",
+    "Alles klar.",
+    "Danke, dass du das mit mir teilst.",
+    "Ich höre dir zu.",
+    "Danke für deine Offenheit.",
+    "Das ist gut zu wissen.",
+    "Ich verstehe deine Situation.",
+    "Danke für deine Antwort."
+)
+
+EMPATHY_PHRASES = (
+    "Das klingt wirklich herausfordernd.",
+    "Ich kann mir vorstellen, dass das belastend ist.",
+    "Das ist wirklich nicht einfach.",
+    "Ich verstehe, dass dich das belastet.",
+    "Das klingt nach einer schwierigen Situation.",
+    "Das tut mir leid zu hören.",
+    "Ich kann verstehen, dass dich das belastet.",
+    "Das ist wirklich nicht leicht.",
+    "Ich höre, dass dich das sehr beschäftigt.",
+    "Das klingt nach einer großen Herausforderung."
+)
+
+TRANSITION_PHRASES = (
+    "Lass uns gemeinsam schauen, wie wir das angehen können.",
+    "Ich helfe dir gerne weiter.",
+    "Lass uns das Schritt für Schritt angehen.",
+    "Ich bin für dich da, um zu helfen.",
+    "Gemeinsam finden wir einen Weg.",
+    "Lass uns das systematisch angehen.",
+    "Ich unterstütze dich dabei.",
+    "Zusammen schaffen wir das.",
+    "Lass uns das Stück für Stück durchgehen.",
+    "Ich begleite dich durch diesen Prozess."
+)
 
 def get_acknowledgment() -> str:
     """Return a random acknowledgment phrase."""
-    acknowledgments = [
-        "Verstehe.",
-        "Ich verstehe.",
-        "Danke für diese Information.",
-        "Alles klar.",
-        "Danke, dass du das mit mir teilst.",
-        "Ich höre dir zu.",
-        "Danke für deine Offenheit.",
-        "Das ist gut zu wissen.",
-        "Ich verstehe deine Situation.",
-        "Danke für deine Antwort."
-    ]
-    return random.choice(acknowledgments)
+    return _choice(ACKNOWLEDGMENTS)
 
 def get_empathy_phrase() -> str:
     """Return a random empathy phrase."""
-    empathy_phrases = [
-        "Das klingt wirklich herausfordernd.",
-        "Ich kann mir vorstellen, dass das belastend ist.",
-        "Das ist wirklich nicht einfach.",
-        "Ich verstehe, dass dich das belastet.",
-        "Das klingt nach einer schwierigen Situation.",
-        "Das tut mir leid zu hören.",
-        "Ich kann verstehen, dass dich das belastet.",
-        "Das ist wirklich nicht leicht.",
-        "Ich höre, dass dich das sehr beschäftigt.",
-        "Das klingt nach einer großen Herausforderung."
-    ]
-    return random.choice(empathy_phrases)
+    return _choice(EMPATHY_PHRASES)
 
 def get_transition_phrase() -> str:
     """Return a random transition phrase."""
-    transitions = [
-        "Lass uns gemeinsam schauen, wie wir das angehen können.",
-        "Ich helfe dir gerne weiter.",
-        "Lass uns das Schritt für Schritt angehen.",
-        "Ich bin für dich da, um zu helfen.",
-        "Gemeinsam finden wir einen Weg.",
-        "Lass uns das systematisch angehen.",
-        "Ich unterstütze dich dabei.",
-        "Zusammen schaffen wir das.",
-        "Lass uns das Stück für Stück durchgehen.",
-        "Ich begleite dich durch diesen Prozess."
-    ]
-    return random.choice(transitions)
+    return _choice(TRANSITION_PHRASES)
 
 def update_conversation(conversation_id: str, user_input: str, conversation_state: dict) -> dict:
-    """Update conversation state based on user input."""
+    """Update conversation state in place based on user input and return the response."""
+    user_input_lower = user_input.lower()
+    
     # Initialize conversation if this is the first message
     if 'step' not in conversation_state:
         conversation_state['step'] = 0
         conversation_state['data'] = {}
         conversation_state['previous_responses'] = []
         return {
-            'response': get_next_question(conversation_state),
-            'state': conversation_state
+            'response': get_next_question(conversation_state)
         }
     
     current_step = conversation_state.get('step', 0)
@@ -336,50 +436,35 @@ def update_conversation(conversation_id: str, user_input: str, conversation_stat
     conversation_state['previous_responses'] = (conversation_state.get('previous_responses', []) + [user_input])[-3:]
     
     # Handle emergency situations first
-    emergency_phrases = {
-        'selbstmord': "Das klingt sehr besorgniserregend. Bitte wende dich sofort an die Telefonseelsorge unter 0800 111 0 111. Du bist nicht allein und es gibt Menschen, die dir helfen können.",
-        'selbstmorden': "Das klingt sehr besorgniserregend. Bitte wende dich sofort an die Telefonseelsorge unter 0800 111 0 111. Du bist nicht allein und es gibt Menschen, die dir helfen können.",
-        'umbringen': "Das klingt sehr beunruhigend. Bitte kontaktiere umgehend eine Vertrauensperson oder die Telefonseelsorge unter 0800 111 0 111.",
-        'sterben': "Es tut mir leid zu hören, dass du solche Gedanken hast. Bitte wende dich an jemanden, der dir helfen kann, zum Beispiel die Telefonseelsorge unter 0800 111 0 111.",
-        'leben beenden': "Das klingt sehr belastend. Bitte wende dich sofort an eine Person deines Vertrauens oder die Telefonseelsorge unter 0800 111 0 111. Du bist nicht allein.",
-        'kann nicht mehr': "Ich höre, wie schwer es dir gerade fällt. Es ist wichtig, dass du dir jetzt Hilfe holst. Möchtest du, dass ich dir dabei helfe, Unterstützung zu finden?",
-        'sinnlos': "Es tut mir leid, dass du dich so fühlst. Manchmal kann es helfen, mit jemandem zu sprechen. Die Telefonseelsorge ist rund um die Uhr erreichbar unter 0800 111 0 111.",
-        'aufgeben': "Ich verstehe, dass du dich überfordert fühlst. Aber es gibt immer einen Ausweg, auch wenn du ihn gerade nicht siehst. Möchtest du, dass wir gemeinsam nach Lösungen suchen?",
-        'keinen Ausweg': "Es tut mir leid zu hören, dass du dich so fühlst. Manchmal kann ein Gespräch mit einer neutralen Person helfen. Die Telefonseelsorge ist unter 0800 111 0 111 erreichbar.",
-        'kein Sinn mehr': "Ich höre, wie verzweifelt du bist. Bitte glaub mir, dass es Menschen gibt, die dir helfen können. Möchtest du, dass ich dir dabei helfe, Unterstützung zu finden?"
-    }
-    
-    for phrase, response in emergency_phrases.items():
-        if phrase in user_input.lower():
-            return {
-                'response': f"{get_empathy_phrase()} {response} Möchtest du, dass ich dir dabei helfe, Unterstützung zu finden?",
-                'state': conversation_state
-            }
+    # Respond to the most severe phrase found, not the one that appears first
+    emergency_matches = EMERGENCY_RE.findall(user_input_lower)
+    if emergency_matches:
+        response = EMERGENCY_PHRASES[min(emergency_matches, key=EMERGENCY_PRIORITY.get)]
+        return {
+            'response': f"{get_empathy_phrase()} {response} Möchtest du, dass ich dir dabei helfe, Unterstützung zu finden?"
+        }
     
     # Handle user input for the current step
     if current_step < len(CONVERSATION_FLOW):
         current_question = CONVERSATION_FLOW[current_step]
-        field_type = current_question.get('type', 'text')
-        validation = current_question.get('validation')
-        options = current_question.get('options')
         
         # Validate input
         is_valid, result = validate_input(
             user_input, 
-            field_type=field_type,
-            validation=validation,
-            options=options
+            field_type=current_question.type,
+            validation=current_question.validation,
+            options=current_question.options,
+            options_lower=current_question.options_lower
         )
         
         if not is_valid:
             # Show validation error and ask the same question again
             return {
-                'response': f"{result}\n\n{current_question['question']}\n\n({current_question.get('hint', '')})",
-                'state': conversation_state
+                'response': f"{result}\n\n{current_question.question}\n\n({current_question.hint or ''})"
             }
         
         # Store the validated input
-        conversation_state['data'][current_question['key']] = result
+        conversation_state['data'][current_question.key] = result
         conversation_state['step'] += 1
     
     # Get next question or provide summary
@@ -399,8 +484,7 @@ def update_conversation(conversation_id: str, user_input: str, conversation_stat
             response = f"{get_empathy_phrase()} {get_transition_phrase()} {next_question}"
         
         return {
-            'response': response,
-            'state': conversation_state
+            'response': response
         }
     else:
         # Conversation complete - generate and return summary
@@ -424,40 +508,63 @@ def update_conversation(conversation_id: str, user_input: str, conversation_stat
             )
         
         return {
-            'response': summary + follow_up,
-            'state': conversation_state
+            'response': summary + follow_up
         }
 
+async def load_conversation(conversation_id: str) -> Optional[dict]:
+    """Load a conversation state from the configured store."""
+    if redis_client is not None:
+        raw_state = await redis_client.get(f'conversation:{conversation_id}')
+        return orjson.loads(raw_state) if raw_state else None
+    return conversations.get(conversation_id)
+
+async def save_conversation(conversation_id: str, conversation_state: dict) -> None:
+    """Persist a conversation state, refreshing its expiry."""
+    if redis_client is not None:
+        await redis_client.set(f'conversation:{conversation_id}', orjson.dumps(conversation_state), ex=CONVERSATION_TTL)
+    else:
+        conversations[conversation_id] = conversation_state
+
+async def stream_response(response: str, conversation_id: str):
+    """Yield a chat response as server-sent events, one line per event."""
+    for line in response.split('\n'):
+        yield f"data: {line}\n\n".encode()
+    done = orjson.dumps({'conversation_id': conversation_id, 'status': 'success'}).decode()
+    yield f"event: done\ndata: {done}\n\n".encode()
+
 @app.route('/')
-def index():
-    return render_template('index.html')
+async def index():
+    # The page is static, so outside debug mode it is rendered once on the first
+    # request (url_for needs a request context) and served from memory afterwards
+    global index_html
+    if app.debug:
+        return await render_template('index.html')
+    if index_html is None:
+        index_html = await render_template('index.html')
+    return index_html
 
 @app.route('/api/chat', methods=['POST'])
-def chat():
+async def chat():
     try:
-        data = request.json
+        data = await request.get_json()
         user_input = data.get('message', '').strip()
-        conversation_id = data.get('conversation_id', f'conv_{datetime.now().strftime("%Y%m%d%H%M%S")}_{os.urandom(4).hex()}')
+        conversation_id = data.get('conversation_id') or f'conv_{secrets.token_hex(16)}'
         
         # Initialize conversation if it doesn't exist
-        if conversation_id not in conversations:
-            conversations[conversation_id] = {'step': 0, 'data': {}, 'start_time': datetime.now().isoformat()}
+        conversation_state = await load_conversation(conversation_id)
+        if conversation_state is None:
+            conversation_state = {'step': 0, 'data': {}, 'start_time': time.time()}
         
-        conversation_state = conversations[conversation_id]
-        
-        # Process the message and get response
+        # Process the message and get response; the state is updated in place
         result = update_conversation(conversation_id, user_input, conversation_state)
         
-        # Update conversation state from result if it exists, otherwise keep the current state
-        if 'state' in result:
-            conversation_state = result['state']
-            conversations[conversation_id] = conversation_state
-        
         # Update last activity timestamp
-        conversation_state['last_activity'] = datetime.now().isoformat()
+        conversation_state['last_activity'] = time.time()
+        await save_conversation(conversation_id, conversation_state)
         
-        # Clean up old conversations (older than 24 hours)
-        cleanup_old_conversations()
+        # Clients that accept server-sent events get the reply streamed line by line
+        if 'text/event-stream' in request.headers.get('Accept', ''):
+            return Response(stream_response(result['response'], conversation_id), mimetype='text/event-stream')
         
         return jsonify({
             'response': result['response'],
@@ -473,29 +580,37 @@ def chat():
         }), 500
 
 def cleanup_old_conversations():
-    """Remove conversations older than 24 hours."""
-    now = datetime.now()
-    to_delete = []
+    """Remove in-memory conversations older than 24 hours."""
+    global conversations
+    now_ts = time.time()
     
-    for conv_id, conv_data in conversations.items():
-        last_activity = conv_data.get('last_activity', conv_data.get('start_time'))
-        if not last_activity:
-            continue
-            
-        if isinstance(last_activity, str):
-            try:
-                last_activity = datetime.fromisoformat(last_activity)
-            except (ValueError, TypeError):
-                continue
-        
-        if (now - last_activity) > timedelta(hours=24):
-            to_delete.append(conv_id)
-    
-    for conv_id in to_delete:
-        del conversations[conv_id]
+    # Rebuild the store in a single pass; conversations without a timestamp are kept
+    conversations = {
+        conv_id: conv_data
+        for conv_id, conv_data in conversations.items()
+        if now_ts - conv_data.get('last_activity', conv_data.get('start_time', now_ts)) <= CONVERSATION_TTL
+    }
+
+async def periodic_cleanup():
+    """Sweep the in-memory store every CLEANUP_INTERVAL seconds."""
+    while True:
+        await asyncio.sleep(CLEANUP_INTERVAL)
+        cleanup_old_conversations()
+
+@app.before_serving
+async def start_cleanup_task():
+    # Redis expires keys itself, only the in-memory store needs sweeping
+    global cleanup_task
+    if redis_client is None:
+        cleanup_task = asyncio.create_task(periodic_cleanup())
+
+@app.after_serving
+async def stop_cleanup_task():
+    if cleanup_task is not None:
+        cleanup_task.cancel()
 
 if __name__ == '__main__':
-    # Configure Flask app
+    # Configure Quart app
     app.secret_key = os.environ.get('FLASK_SECRET_KEY', 'dev-secret-key-123')
     app.config['SESSION_TYPE'] = 'filesystem'
     app.config['PERMANENT_SESSION_LIFETIME'] = timedelta(hours=24)
@@ -503,5 +618,6 @@ if __name__ == '__main__':
     # Create necessary directories
     os.makedirs('instance/sessions', exist_ok=True)
     
-    # Run the app
+    # Run the development server; in production serve via ASGI, e.g.
+    # `REDIS_URL=redis://localhost:6379/0 uvicorn app:app --workers 4`
     app.run(debug=True, host='0.0.0.0', port=5000)